@@ -205,7 +205,7 @@ def encode_preview_for_mcp(
     if cache_key:
         cached = _get_cached_preview(cache_key)
         if cached:
-            logger.debug(f"Cache hit for {cache_key}")
+            logger.debug("Cache hit for %s", cache_key)
             return cached
     
     # Load image from various sources and track source size
@@ -2,6 +2,7 @@ import requests
 import json
 import time
 import logging
+import os
 from typing import Any, Dict, Optional, Sequence
 from urllib.parse import quote
 
@@ -10,9 +11,22 @@ from asset_processor import get_image_metadata
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ComfyUIClient")
 
+# Output file extension (lowercase) -> MIME type
+_MIME_TYPES_BY_EXTENSION = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".mp3": "audio/mpeg",
+    ".mp4": "video/mp4",
+    ".gif": "image/gif",
+}
+
 class ComfyUIClient:
     def __init__(self, base_url):
         self.base_url = base_url
+        # One session for all ComfyUI calls so connections are kept alive and reused
+        self._session = requests.Session()
         self.available_models = self._get_available_models()
     
     def refresh_models(self):
@@ -22,7 +36,7 @@ class ComfyUIClient:
     def _get_available_models(self):
         """Fetch list of available checkpoint models from ComfyUI"""
         try:
-            response = requests.get(f"{self.base_url}/object_info/CheckpointLoaderSimple", timeout=10)
+            response = self._session.get(f"{self.base_url}/object_info/CheckpointLoaderSimple", timeout=10)
             if response.status_code != 200:
                 logger.warning("Failed to fetch model list; using default handling")
                 return []
@@ -109,18 +123,9 @@ class ComfyUIClient:
                     if isinstance(asset, dict):
                         # Infer mime type from filename extension
                         filename = asset.get("filename", "")
-                        if filename.endswith((".png", ".PNG")):
-                            metadata["mime_type"] = "image/png"
-                        elif filename.endswith((".jpg", ".jpeg", ".JPG", ".JPEG")):
-                            metadata["mime_type"] = "image/jpeg"
-                        elif filename.endswith((".webp", ".WEBP")):
-                            metadata["mime_type"] = "image/webp"
-                        elif filename.endswith((".mp3", ".MP3")):
-                            metadata["mime_type"] = "audio/mpeg"
-                        elif filename.endswith((".mp4", ".MP4")):
-                            metadata["mime_type"] = "video/mp4"
-                        elif filename.endswith((".gif", ".GIF")):
-                            metadata["mime_type"] = "image/gif"
+                        mime_type = _MIME_TYPES_BY_EXTENSION.get(os.path.splitext(filename)[1].lower())
+                        if mime_type:
+                            metadata["mime_type"] = mime_type
                         break
         
         # Extract dimensions from workflow (EmptyLatentImage node) - much more efficient than analyzing image
@@ -139,7 +144,7 @@ class ComfyUIClient:
         
         # Try to fetch headers to get size (non-blocking, best effort)
         try:
-            response = requests.head(asset_url, timeout=5)
+            response = self._session.head(asset_url, timeout=5)
             if response.status_code == 200:
                 content_length = response.headers.get("Content-Length")
                 if content_length:
@@ -155,7 +160,7 @@ class ComfyUIClient:
         if metadata["mime_type"] and metadata["mime_type"].startswith("image/") and (metadata["width"] is None or metadata["height"] is None):
             try:
                 # Fetch image bytes to extract dimensions
-                img_response = requests.get(asset_url, timeout=10)
+                img_response = self._session.get(asset_url, timeout=10)
                 if img_response.status_code == 200:
                     image_bytes = img_response.content
                     # Update bytes_size if we got it from the full response
@@ -173,7 +178,7 @@ class ComfyUIClient:
 
     def _queue_workflow(self, workflow: Dict[str, Any]):
         logger.info("Submitting workflow to ComfyUI...")
-        response = requests.post(f"{self.base_url}/prompt", json={"prompt": workflow}, timeout=30)
+        response = self._session.post(f"{self.base_url}/prompt", json={"prompt": workflow}, timeout=30)
         if response.status_code != 200:
             raise Exception(f"Failed to queue workflow: {response.status_code} - {response.text}")
         try:
@@ -190,7 +195,7 @@ class ComfyUIClient:
         for attempt in range(max_attempts):
             try:
                 # Try both the specific prompt_id endpoint and the full history endpoint
-                response = requests.get(f"{self.base_url}/history/{prompt_id}", timeout=10)
+                response = self._session.get(f"{self.base_url}/history/{prompt_id}", timeout=10)
                 # If that doesn't work, we can also try: f"{self.base_url}/history"
                 if response.status_code != 200:
                     logger.warning("History endpoint returned %s on attempt %s", response.status_code, attempt + 1)
@@ -246,7 +251,7 @@ class ComfyUIClient:
                                 time.sleep(3)  # Give ComfyUI time to write outputs (longer for cached)
                                 # Try fetching full history to see if outputs appear there
                                 try:
-                                    full_history_response = requests.get(f"{self.base_url}/history", timeout=10)
+                                    full_history_response = self._session.get(f"{self.base_url}/history", timeout=10)
                                     if full_history_response.status_code == 200:
                                         full_history = full_history_response.json()
                                         if prompt_id in full_history:
@@ -277,8 +282,10 @@ class ComfyUIClient:
                     raise Exception("Workflow completed but produced no outputs. Check ComfyUI logs for errors.")
                 
                 logger.info("Workflow completed. Output nodes: %s", list(outputs.keys()))
-                logger.debug("Full workflow outputs: %s", json.dumps(outputs, indent=2))
-                logger.debug("Full prompt data: %s", json.dumps(prompt_data, indent=2))
+                # Only serialize the (potentially large) payloads when debug output is on
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Full workflow outputs: %s", json.dumps(outputs, indent=2))
+                    logger.debug("Full prompt data: %s", json.dumps(prompt_data, indent=2))
                 return outputs
             except requests.RequestException as e:
                 logger.warning("Request error on attempt %s: %s", attempt + 1, e)
@@ -372,7 +379,7 @@ class ComfyUIClient:
         Returns the full /queue endpoint response.
         """
         try:
-            response = requests.get(f"{self.base_url}/queue", timeout=10)
+            response = self._session.get(f"{self.base_url}/queue", timeout=10)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -393,7 +400,7 @@ class ComfyUIClient:
                 url = f"{self.base_url}/history/{prompt_id}"
             else:
                 url = f"{self.base_url}/history"
-            response = requests.get(url, timeout=10)
+            response = self._session.get(url, timeout=10)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
@@ -410,7 +417,7 @@ class ComfyUIClient:
             Response from ComfyUI cancel endpoint.
         """
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/queue",
                 json={"delete": [prompt_id]},
                 timeout=10
@@ -1,19 +1,23 @@
 """Asset registry for tracking generated assets"""
 
+import heapq
 import logging
+import sys
 import threading
+import time
 import uuid
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from models.asset import AssetRecord
 
 logger = logging.getLogger("MCP_Server")
 
 
-def _make_asset_key(filename: str, subfolder: str, folder_type: str) -> str:
-    """Create a stable lookup key from asset identity."""
-    return f"{folder_type}:{subfolder}:{filename}"
+def _new_asset_id() -> str:
+    """Generate a fresh asset_id (UUID-based for uniqueness)."""
+    return str(uuid.uuid4())
 
 
 class AssetRegistry:
@@ -23,12 +27,39 @@ class AssetRegistry:
     making the system robust to URL changes (e.g., different hostnames).
     """
     
-    def __init__(self, ttl_hours: int = 24, comfyui_base_url: str = "http://localhost:8188"):
-        self._assets: Dict[str, AssetRecord] = {}  # asset_id -> AssetRecord
-        self._asset_key_to_id: Dict[str, str] = {}  # (filename, subfolder, type) -> asset_id
-        self._lock = threading.RLock()  # Reentrant lock for thread safety
+    def __init__(
+        self,
+        ttl_hours: int = 24,
+        comfyui_base_url: str = "http://localhost:8188",
+        max_assets: Optional[int] = 10_000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._assets: Dict[str, AssetRecord] = {}  # asset_id -> AssetRecord (insertion order == created_at order)
+        # Identity index points straight at the record, so identity lookups skip the _assets hop
+        self._by_identity: Dict[Tuple[str, str, str], AssetRecord] = {}  # (filename, subfolder, type) -> AssetRecord
+        # Secondary indexes for list_assets filters. Values are dicts used as
+        # insertion-ordered sets so they can be walked newest-first.
+        self._by_workflow: Dict[str, Dict[str, None]] = {}  # workflow_id -> {asset_id}
+        self._by_session: Dict[str, Dict[str, None]] = {}  # session_id -> {asset_id}
+        # Provenance payloads, kept out of AssetRecord so listing only touches small records
+        self._history: Dict[str, Dict[str, Any]] = {}  # asset_id -> {"comfy_history", "submitted_workflow"}
+        # Min-heap of (expires_at, asset_id) so cleanup only touches expired entries.
+        # Entries for records that were already removed are skipped when popped,
+        # and the heap is compacted once they outnumber the live records.
+        self._expiry_heap: List[Tuple[float, str]] = []
+        # Plain (non-reentrant) lock: public methods never call each other while
+        # holding it; shared logic lives in the *_locked helpers instead.
+        self._lock = threading.Lock()
         self.ttl_hours = ttl_hours
-        self.comfyui_base_url = comfyui_base_url
+        # Source of created_at/expires_at, in seconds; tests inject a fake.
+        # Display timestamps come from time.time() instead (created_at_wall).
+        self._clock = clock
+        # Hard cap on live records (None = unbounded); the oldest are evicted first
+        if max_assets is not None and max_assets < 1:
+            raise ValueError(f"max_assets must be at least 1 or None, got {max_assets}")
+        self.max_assets = max_assets
+        # Normalized once here so per-record URL building and tool fallbacks don't repeat it
+        self.comfyui_base_url = comfyui_base_url.rstrip('/')
         logger.info(f"Initialized AssetRegistry with TTL: {ttl_hours} hours")
     
     def register_asset(
@@ -52,92 +83,93 @@ class AssetRegistry:
         Uses (filename, subfolder, type) as stable identity instead of URL.
         """
         with self._lock:
-            # Create stable lookup key
-            asset_key = _make_asset_key(filename, subfolder, folder_type)
-            
-            # Check if asset already exists (deduplication)
-            existing_id = self._asset_key_to_id.get(asset_key)
-            if existing_id and existing_id in self._assets:
-                existing = self._assets[existing_id]
-                # Check if expired
-                if existing.expires_at and datetime.now() > existing.expires_at:
-                    # Remove expired asset
-                    del self._assets[existing_id]
-                    del self._asset_key_to_id[asset_key]
-                else:
-                    # Update existing asset with new metadata/history if provided
-                    if comfy_history is not None:
-                        existing.comfy_history = comfy_history
-                    if submitted_workflow is not None:
-                        existing.submitted_workflow = submitted_workflow
-                    logger.debug(f"Asset {asset_key} already registered, returning existing record")
-                    return existing
-            
-            # Generate asset_id (UUID-based for uniqueness)
-            asset_id = str(uuid.uuid4())
-            
-            # Calculate expiration
-            expires_at = datetime.now() + timedelta(hours=self.ttl_hours)
-            
-            # Create record
-            record = AssetRecord(
-                asset_id=asset_id,
+            # Read the clock under the lock so insertion order matches created_at order
+            record, created = self._register_locked(
+                self._clock(),
+                time.time(),
+                _new_asset_id,
                 filename=filename,
                 subfolder=subfolder,
                 folder_type=folder_type,
-                prompt_id=prompt_id,
                 workflow_id=workflow_id,
-                created_at=datetime.now(),
-                expires_at=expires_at,
-                mime_type=mime_type or "application/octet-stream",
+                prompt_id=prompt_id,
+                mime_type=mime_type,
                 width=width,
                 height=height,
-                bytes_size=bytes_size or 0,
-                sha256=None,  # Will be computed if needed
+                bytes_size=bytes_size,
                 comfy_history=comfy_history,
                 submitted_workflow=submitted_workflow,
-                metadata=metadata or {},
+                metadata=metadata,
                 session_id=session_id
             )
-            
-            # Set base URL for asset URL computation
-            record.set_base_url(self.comfyui_base_url)
-            
-            self._assets[asset_id] = record
-            self._asset_key_to_id[asset_key] = asset_id
-            
-            logger.debug(f"Registered asset {asset_id} ({asset_key}) for workflow {workflow_id}")
+            if created:
+                logger.debug(
+                    "Registered asset %s (%s, %s, %s) for workflow %s",
+                    record.asset_id, filename, subfolder, folder_type, workflow_id
+                )
             return record
     
+    def register_assets_bulk(self, assets: List[Dict[str, Any]]) -> List[AssetRecord]:
+        """Register several assets at once, e.g. every output of a batch workflow.
+        
+        Each item holds the keyword arguments of register_asset. The lock and
+        clock are taken once for the whole batch. Returns the records in input
+        order.
+        """
+        if not assets:
+            return []
+        
+        # Lazy: an ID is only drawn when a record is actually created, so
+        # duplicates in the batch don't consume any
+        new_id = partial(next, (_new_asset_id() for _ in assets))
+        
+        records = []
+        created_count = 0
+        with self._lock:
+            now = self._clock()
+            wall_now = time.time()
+            for asset in assets:
+                record, created = self._register_locked(now, wall_now, new_id, **asset)
+                records.append(record)
+                created_count += created
+        
+        logger.debug("Bulk registered %d new assets (%d requested)", created_count, len(assets))
+        return records
+    
     def get_asset(self, asset_id: str) -> Optional[AssetRecord]:
         """Retrieve asset record by ID, checking expiration"""
+        # Optimistic read: dict.get is atomic, so a live record (or a miss) is
+        # returned without the lock. Only an expired record needs it, to remove.
+        record = self._assets.get(asset_id)
+        if record is None:
+            return None
+        if record.expires_at is None or self._clock() <= record.expires_at:
+            return record
         with self._lock:
-            record = self._assets.get(asset_id)
-            if not record:
-                return None
-            
-            # Check expiration
-            if record.expires_at and datetime.now() > record.expires_at:
-                logger.debug(f"Asset {asset_id} has expired")
-                asset_key = _make_asset_key(record.filename, record.subfolder, record.folder_type)
-                del self._assets[asset_id]
-                if asset_key in self._asset_key_to_id:
-                    del self._asset_key_to_id[asset_key]
+            return self._get_asset_locked(asset_id)
+    
+    def get_history(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        """Get provenance for an asset, checking expiration.
+        
+        Returns a new dict with 'comfy_history' and 'submitted_workflow' (either
+        may be None), or None if the asset is unknown or expired.
+        """
+        with self._lock:
+            if self._get_asset_locked(asset_id) is None:
                 return None
-            
-            return record
+            # Copy so callers can't mutate stored provenance or see later merges
+            return dict(self._history[asset_id])
     
     def get_asset_by_identity(
         self, filename: str, subfolder: str, folder_type: str
     ) -> Optional[AssetRecord]:
         """Get asset record by stable identity (filename, subfolder, type)."""
         with self._lock:
-            asset_key = _make_asset_key(filename, subfolder, folder_type)
-            asset_id = self._asset_key_to_id.get(asset_key)
-            if not asset_id:
+            record = self._by_identity.get((filename, subfolder, folder_type))
+            if record is None:
                 return None
             
-            return self.get_asset(asset_id)  # This will check expiration
+            return self._check_expiry_locked(record)
     
     def list_assets(
         self, 
@@ -155,43 +187,196 @@ class AssetRegistry:
             session_id: Filter by session ID (e.g., conversation ID)
         """
         with self._lock:
-            # Cleanup expired first
-            self.cleanup_expired()
+            # Cleanup expired first (only peeks at the heap when nothing has expired)
+            self._cleanup_expired_locked()
             
-            # Collect all assets
-            assets = list(self._assets.values())
+            # Pick the candidate ids, newest first. _assets and the secondary
+            # indexes are insertion-ordered, and created_at comes from a
+            # monotonic clock, so no sort is needed.
+            if workflow_id and session_id:
+                workflow_ids = self._by_workflow.get(workflow_id, {})
+                session_ids = self._by_session.get(session_id, {})
+                # Walk the smaller index and probe the larger one
+                if len(workflow_ids) > len(session_ids):
+                    workflow_ids, session_ids = session_ids, workflow_ids
+                candidate_ids = (
+                    asset_id for asset_id in reversed(workflow_ids)
+                    if asset_id in session_ids
+                )
+            elif workflow_id:
+                candidate_ids = reversed(self._by_workflow.get(workflow_id, {}))
+            elif session_id:
+                candidate_ids = reversed(self._by_session.get(session_id, {}))
+            else:
+                candidate_ids = reversed(self._assets)
             
-            # Filter by workflow_id if provided
-            if workflow_id:
-                assets = [a for a in assets if a.workflow_id == workflow_id]
-            
-            # Filter by session_id if provided
-            if session_id:
-                assets = [a for a in assets if a.session_id == session_id]
-            
-            # Sort by creation time (newest first)
-            assets.sort(key=lambda a: a.created_at, reverse=True)
-            
-            # Apply limit
-            return assets[:limit]
+            # Take the first `limit` ids lazily; nothing beyond them is visited
+            return [self._assets[asset_id] for asset_id in islice(candidate_ids, max(limit, 0))]
     
     def cleanup_expired(self):
-        """Remove expired assets from registry"""
+        """Remove expired assets from registry.
+        
+        Pops from the expiry heap, so the cost is proportional to the number
+        of expired entries rather than the size of the registry.
+        """
         with self._lock:
-            now = datetime.now()
-            expired_ids = [
-                asset_id for asset_id, record in self._assets.items()
-                if record.expires_at and now > record.expires_at
+            return self._cleanup_expired_locked()
+    
+    def _register_locked(
+        self,
+        now: float,
+        wall_now: float,
+        new_id: Callable[[], str],
+        filename: str,
+        subfolder: str,
+        folder_type: str,
+        workflow_id: str,
+        prompt_id: str,
+        mime_type: Optional[str] = None,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        bytes_size: Optional[int] = None,
+        comfy_history: Optional[Dict[str, Any]] = None,
+        submitted_workflow: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None
+    ) -> Tuple[AssetRecord, bool]:
+        """register_asset body. Caller must hold the lock.
+        
+        Returns the record and whether it was newly created.
+        """
+        # folder_type comes from a tiny set ("output", "input", "temp"); interning
+        # lets every record and identity key share one string object
+        folder_type = sys.intern(folder_type)
+        # Create stable lookup key. Names are kept exactly as ComfyUI reported
+        # them: composed and decomposed Unicode spellings can be distinct files.
+        asset_key = (filename, subfolder, folder_type)
+        
+        # Check if asset already exists (deduplication)
+        existing = self._by_identity.get(asset_key)
+        if existing is not None:
+            if existing.expires_at is None or now <= existing.expires_at:
+                # Fast path: nothing to merge (e.g. a retried registration)
+                if comfy_history is None and submitted_workflow is None:
+                    return existing, False
+                # Update existing asset with new history if provided
+                history = self._history[existing.asset_id]
+                if comfy_history is not None:
+                    history["comfy_history"] = comfy_history
+                if submitted_workflow is not None:
+                    history["submitted_workflow"] = submitted_workflow
+                logger.debug("Asset %s already registered, returning existing record", asset_key)
+                return existing, False
+            # Remove expired asset
+            self._remove_asset(existing)
+        
+        # Generate asset_id (UUID-based for uniqueness)
+        asset_id = new_id()
+        
+        # Calculate expiration
+        expires_at = now + self.ttl_hours * 3600
+        
+        # Create record
+        record = AssetRecord(
+            asset_id=asset_id,
+            filename=filename,
+            subfolder=subfolder,
+            folder_type=folder_type,
+            prompt_id=prompt_id,
+            workflow_id=workflow_id,
+            created_at=now,
+            expires_at=expires_at,
+            created_at_wall=wall_now,
+            mime_type=mime_type or "application/octet-stream",
+            width=width,
+            height=height,
+            bytes_size=bytes_size or 0,
+            sha256=None,  # Will be computed if needed
+            metadata=metadata or {},
+            session_id=session_id
+        )
+        
+        # Set base URL for asset URL computation
+        record.set_base_url(self.comfyui_base_url)
+        
+        self._assets[asset_id] = record
+        self._by_identity[asset_key] = record
+        self._history[asset_id] = {
+            "comfy_history": comfy_history,
+            "submitted_workflow": submitted_workflow,
+        }
+        self._by_workflow.setdefault(workflow_id, {})[asset_id] = None
+        if session_id:
+            self._by_session.setdefault(session_id, {})[asset_id] = None
+        heapq.heappush(self._expiry_heap, (expires_at, asset_id))
+        
+        # Enforce the size cap. _assets is in creation order, so its first
+        # entry is always the oldest record. _remove_asset compacts the heap.
+        if self.max_assets is not None:
+            while len(self._assets) > self.max_assets:
+                self._remove_asset(next(iter(self._assets.values())))
+        return record, True
+    
+    def _get_asset_locked(self, asset_id: str) -> Optional[AssetRecord]:
+        """get_asset body. Caller must hold the lock."""
+        record = self._assets.get(asset_id)
+        if not record:
+            return None
+        
+        return self._check_expiry_locked(record)
+    
+    def _check_expiry_locked(self, record: AssetRecord) -> Optional[AssetRecord]:
+        """Return the record if still live, else remove it and return None. Caller must hold the lock."""
+        if record.expires_at is not None and self._clock() > record.expires_at:
+            logger.debug("Asset %s has expired", record.asset_id)
+            self._remove_asset(record)
+            return None
+        
+        return record
+    
+    def _cleanup_expired_locked(self) -> int:
+        """cleanup_expired body. Caller must hold the lock."""
+        now = self._clock()
+        heap = self._expiry_heap
+        cleaned = 0
+        while heap and heap[0][0] < now:
+            expires_at, asset_id = heapq.heappop(heap)
+            record = self._assets.get(asset_id)
+            # Skip entries whose record was already removed or re-registered
+            if record is None or record.expires_at != expires_at:
+                continue
+            self._remove_asset(record)
+            cleaned += 1
+        
+        if cleaned:
+            logger.info(f"Cleaned up {cleaned} expired assets")
+        
+        return cleaned
+    
+    def _remove_asset(self, record: AssetRecord) -> None:
+        """Drop a record from the registry and all indexes. Caller must hold the lock."""
+        asset_id = record.asset_id
+        del self._assets[asset_id]
+        del self._history[asset_id]
+        asset_key = (record.filename, record.subfolder, record.folder_type)
+        if self._by_identity.get(asset_key) is record:
+            del self._by_identity[asset_key]
+        for index, index_key in ((self._by_workflow, record.workflow_id), (self._by_session, record.session_id)):
+            bucket = index.get(index_key)
+            if bucket is not None:
+                bucket.pop(asset_id, None)
+                if not bucket:
+                    del index[index_key]
+        
+        # Removed records leave stale heap entries behind (eviction never pops
+        # them). Rebuild from the live records once stale entries dominate, so
+        # the heap stays O(live records); amortized O(1) per removal.
+        heap = self._expiry_heap
+        if len(heap) > 2 * len(self._assets):
+            # In place: _cleanup_expired_locked holds a reference to the list
+            heap[:] = [
+                (live.expires_at, live.asset_id)
+                for live in self._assets.values()
+                if live.expires_at is not None
             ]
-            
-            for asset_id in expired_ids:
-                record = self._assets[asset_id]
-                asset_key = _make_asset_key(record.filename, record.subfolder, record.folder_type)
-                del self._assets[asset_id]
-                if asset_key in self._asset_key_to_id:
-                    del self._asset_key_to_id[asset_key]
-            
-            if expired_ids:
-                logger.info(f"Cleaned up {len(expired_ids)} expired assets")
-            
-            return len(expired_ids)
+            heapq.heapify(heap)
@@ -4,7 +4,8 @@ import json
 import logging
 import os
 from pathlib import Path
-from typing import Any, Dict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
 
 from comfyui_client import ComfyUIClient
 
@@ -14,6 +15,50 @@ logger = logging.getLogger("MCP_Server")
 CONFIG_DIR = Path.home() / ".config" / "comfy-mcp"
 CONFIG_FILE = CONFIG_DIR / "config.json"
 
+# Default namespaces (tuple for ordered iteration, frozenset for membership checks)
+_NAMESPACES = ("image", "audio", "video")
+_NAMESPACE_SET = frozenset(_NAMESPACES)
+
+# Returned for namespaces that have no defaults
+_NO_DEFAULTS: Mapping[str, Any] = MappingProxyType({})
+
+# Built-in defaults (lowest precedence), shared read-only by every instance
+_HARDCODED_DEFAULTS: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    "image": MappingProxyType({
+        "width": 512,
+        "height": 512,
+        "steps": 20,
+        "cfg": 8.0,
+        "sampler_name": "euler",
+        "scheduler": "normal",
+        "denoise": 1.0,
+        "model": "v1-5-pruned-emaonly.ckpt",
+        "negative_prompt": "text, watermark",
+    }),
+    "audio": MappingProxyType({
+        "steps": 50,
+        "cfg": 5.0,
+        "sampler_name": "euler",
+        "scheduler": "simple",
+        "denoise": 1.0,
+        "seconds": 60,
+        "lyrics_strength": 0.99,
+        "model": "ace_step_v1_3.5b.safetensors",
+    }),
+    "video": MappingProxyType({
+        "width": 1280,
+        "height": 720,
+        "steps": 20,
+        "cfg": 8.0,
+        "sampler_name": "euler",
+        "scheduler": "normal",
+        "denoise": 1.0,
+        "negative_prompt": "text, watermark",
+        "duration": 5,
+        "fps": 16,
+    }),
+})
+
 
 class DefaultsManager:
     """Manages default values with precedence: per-call > runtime > config > env > hardcoded"""
@@ -25,62 +70,43 @@ class DefaultsManager:
             "audio": {},
             "video": {}
         }
+        # Full config file contents, kept in memory so persist_defaults need not re-read it
+        self._config_json = self._load_config()
         self._config_defaults = self._load_config_defaults()
+        # Environment defaults are read once; os.getenv is not re-queried per lookup.
+        # Call reload_env() to pick up changed environment variables.
+        self._env_defaults = self._get_env_defaults()
         # Model validation state
-        self._available_models_set: set[str] = set()
+        self._available_models_set: frozenset[str] = frozenset()
         self._invalid_models: Dict[str, str] = {}  # Maps namespace -> model name for invalid defaults
-        self._default_sources: Dict[str, Dict[str, str]] = {}  # Tracks source per namespace/key
-        self._hardcoded_defaults = {
-            "image": {
-                "width": 512,
-                "height": 512,
-                "steps": 20,
-                "cfg": 8.0,
-                "sampler_name": "euler",
-                "scheduler": "normal",
-                "denoise": 1.0,
-                "model": "v1-5-pruned-emaonly.ckpt",
-                "negative_prompt": "text, watermark",
-            },
-            "audio": {
-                "steps": 50,
-                "cfg": 5.0,
-                "sampler_name": "euler",
-                "scheduler": "simple",
-                "denoise": 1.0,
-                "seconds": 60,
-                "lyrics_strength": 0.99,
-                "model": "ace_step_v1_3.5b.safetensors",
-            },
-            "video": {
-                "width": 1280,
-                "height": 720,
-                "steps": 20,
-                "cfg": 8.0,
-                "sampler_name": "euler",
-                "scheduler": "normal",
-                "denoise": 1.0,
-                "negative_prompt": "text, watermark",
-                "duration": 5,
-                "fps": 16,
-            }
-        }
+        self._default_sources: Dict[str, Dict[str, str]] = {}  # Tracks source per namespace/key (see _rebuild_effective)
+        # Effective defaults per namespace (all sources merged by precedence)
+        self._effective: Mapping[str, Mapping[str, Any]] = _NO_DEFAULTS
+        self._rebuild_effective()
         # Validate default models at startup (non-fatal, logs warnings)
         self.validate_all_defaults()
     
-    def _load_config_defaults(self) -> Dict[str, Dict[str, Any]]:
-        """Load defaults from config file"""
-        defaults = {"image": {}, "audio": {}, "video": {}}
+    def _load_config(self) -> Dict[str, Any]:
+        """Load the full config file (empty if missing or unreadable)"""
         if CONFIG_FILE.exists():
             try:
                 with open(CONFIG_FILE, "r", encoding="utf-8") as f:
                     config = json.load(f)
-                    defaults["image"] = config.get("defaults", {}).get("image", {})
-                    defaults["audio"] = config.get("defaults", {}).get("audio", {})
-                    defaults["video"] = config.get("defaults", {}).get("video", {})
+                if isinstance(config, dict):
+                    return config
+                logger.warning(f"Ignoring config file {CONFIG_FILE}: top-level value is not an object")
             except (json.JSONDecodeError, IOError) as e:
                 logger.warning(f"Failed to load config file {CONFIG_FILE}: {e}")
-        return defaults
+        return {}
+    
+    def _load_config_defaults(self) -> Dict[str, Dict[str, Any]]:
+        """Extract per-namespace defaults from the loaded config"""
+        config_defaults = self._config_json.get("defaults", {})
+        return {
+            "image": config_defaults.get("image", {}),
+            "audio": config_defaults.get("audio", {}),
+            "video": config_defaults.get("video", {}),
+        }
     
     def _get_env_defaults(self) -> Dict[str, Dict[str, Any]]:
         """Load defaults from environment variables"""
@@ -96,63 +122,69 @@ class DefaultsManager:
             defaults["video"]["model"] = video_model
         return defaults
     
-    def get_default(self, namespace: str, key: str, provided_value: Any = None) -> Any:
-        """Get default value with precedence: provided > runtime > config > env > hardcoded"""
-        if provided_value is not None:
-            return provided_value
-        
-        # Check runtime defaults (highest priority after provided)
-        if key in self._runtime_defaults.get(namespace, {}):
-            return self._runtime_defaults[namespace][key]
-        
-        # Check config file defaults
-        if key in self._config_defaults.get(namespace, {}):
-            return self._config_defaults[namespace][key]
-        
-        # Check environment variables
-        env_defaults = self._get_env_defaults()
-        if key in env_defaults.get(namespace, {}):
-            return env_defaults[namespace][key]
+    def reload_env(self) -> None:
+        """Re-read the COMFY_MCP_DEFAULT_*_MODEL environment variables.
         
-        # Check hardcoded defaults (lowest priority)
-        if key in self._hardcoded_defaults.get(namespace, {}):
-            return self._hardcoded_defaults[namespace][key]
+        The environment is only read at construction and here; changes made
+        after startup are not seen until this is called.
+        """
+        self._env_defaults = self._get_env_defaults()
+        self._rebuild_effective()
+    
+    def _rebuild_effective(self) -> None:
+        """Rebuild the merged defaults. Call after any source changes."""
+        effective = {}
+        sources = {}
+        for namespace in _NAMESPACES:
+            # Start with hardcoded, then layer env, config and runtime (highest)
+            merged: Dict[str, Any] = {}
+            namespace_sources: Dict[str, str] = {}
+            for source, layer in (
+                ("hardcoded", _HARDCODED_DEFAULTS),
+                ("env", self._env_defaults),
+                ("config", self._config_defaults),
+                ("runtime", self._runtime_defaults),
+            ):
+                values = layer.get(namespace, {})
+                merged.update(values)
+                namespace_sources.update(dict.fromkeys(values, source))
+            effective[namespace] = MappingProxyType(merged)
+            sources[namespace] = namespace_sources
+        self._effective = MappingProxyType(effective)
+        self._default_sources = sources
+    
+    @property
+    def effective_defaults(self) -> Mapping[str, Mapping[str, Any]]:
+        """Read-only view of the merged defaults, keyed by namespace.
         
-        return None
+        Hot callers can grab ``effective_defaults[namespace]`` once and
+        subscript it directly instead of calling get_default per key. The
+        view is a snapshot: it is replaced (not mutated) when defaults change.
+        """
+        return self._effective
+    
+    def get_default(self, namespace: str, key: str, provided_value: Any = None) -> Any:
+        """Get default value with precedence: provided > runtime > config > env > hardcoded"""
+        return provided_value if provided_value is not None else self._effective.get(namespace, _NO_DEFAULTS).get(key)
     
     def get_all_defaults(self) -> Dict[str, Dict[str, Any]]:
         """Get all effective defaults (merged from all sources)"""
-        env_defaults = self._get_env_defaults()
-        result = {
-            "image": {},
-            "audio": {},
-            "video": {}
-        }
-        
-        for namespace in ["image", "audio", "video"]:
-            # Start with hardcoded
-            result[namespace] = self._hardcoded_defaults[namespace].copy()
-            # Override with env
-            result[namespace].update(env_defaults.get(namespace, {}))
-            # Override with config
-            result[namespace].update(self._config_defaults.get(namespace, {}))
-            # Override with runtime (highest)
-            result[namespace].update(self._runtime_defaults.get(namespace, {}))
-        
-        return result
+        return {namespace: dict(values) for namespace, values in self._effective.items()}
     
     def set_defaults(self, namespace: str, defaults: Dict[str, Any], validate_models: bool = True) -> Dict[str, Any]:
         """Set runtime defaults for a namespace. Returns validation errors if any."""
         errors = []
         
-        if namespace not in ["image", "audio", "video"]:
+        if namespace not in _NAMESPACE_SET:
             return {"error": f"Invalid namespace: {namespace}. Must be 'image', 'audio', or 'video'"}
         
         # Validate model names if provided
         if validate_models and "model" in defaults:
             model_name = defaults["model"]
-            available_models = self.comfyui_client.available_models
-            if available_models and model_name not in available_models:
+            if not self._available_models_set:
+                self.refresh_model_set()
+            if self._available_models_set and model_name not in self._available_models_set:
+                available_models = self.comfyui_client.available_models
                 errors.append(f"Model '{model_name}' not found. Available models: {available_models[:5]}...")
         
         if errors:
@@ -162,6 +194,7 @@ class DefaultsManager:
         if namespace not in self._runtime_defaults:
             self._runtime_defaults[namespace] = {}
         self._runtime_defaults[namespace].update(defaults)
+        self._rebuild_effective()
         
         # If a model was set and it's valid, clear any invalid model flag
         if "model" in defaults and validate_models:
@@ -176,30 +209,13 @@ class DefaultsManager:
     def refresh_model_set(self) -> None:
         """Refresh the cached set of available models from ComfyUI client."""
         if self.comfyui_client.available_models:
-            self._available_models_set = set(self.comfyui_client.available_models)
+            self._available_models_set = frozenset(self.comfyui_client.available_models)
         else:
-            self._available_models_set = set()
+            self._available_models_set = frozenset()
     
     def _get_default_source(self, namespace: str, key: str) -> str:
         """Determine where a default value came from (runtime/config/env/hardcoded)."""
-        # Check runtime defaults (highest priority)
-        if key in self._runtime_defaults.get(namespace, {}):
-            return "runtime"
-        
-        # Check config file defaults
-        if key in self._config_defaults.get(namespace, {}):
-            return "config"
-        
-        # Check environment variables
-        env_defaults = self._get_env_defaults()
-        if key in env_defaults.get(namespace, {}):
-            return "env"
-        
-        # Check hardcoded defaults (lowest priority)
-        if key in self._hardcoded_defaults.get(namespace, {}):
-            return "hardcoded"
-        
-        return "unknown"
+        return self._default_sources.get(namespace, {}).get(key, "unknown")
     
     def validate_default_model(self, namespace: str) -> tuple[bool, str, str]:
         """Validate the default model for a namespace.
@@ -245,7 +261,7 @@ class DefaultsManager:
         self.refresh_model_set()
         
         # Validate each namespace
-        for namespace in ["image", "audio", "video"]:
+        for namespace in _NAMESPACES:
             is_valid, model_name, source = self.validate_default_model(namespace)
             if not is_valid and model_name:
                 logger.warning(
@@ -260,28 +276,21 @@ class DefaultsManager:
         # Ensure config directory exists
         CONFIG_DIR.mkdir(parents=True, exist_ok=True)
         
-        # Load existing config
-        config = {}
-        if CONFIG_FILE.exists():
-            try:
-                with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                    config = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                config = {}
-        
-        # Update defaults
-        if "defaults" not in config:
-            config["defaults"] = {}
-        if namespace not in config["defaults"]:
-            config["defaults"][namespace] = {}
-        config["defaults"][namespace].update(defaults)
+        # Build the updated config from the in-memory copy (no re-read)
+        config = dict(self._config_json)
+        config_defaults = dict(config.get("defaults", {}))
+        namespace_defaults = {**config_defaults.get(namespace, {}), **defaults}
+        config_defaults[namespace] = namespace_defaults
+        config["defaults"] = config_defaults
         
         # Save config
         try:
             with open(CONFIG_FILE, "w", encoding="utf-8") as f:
                 json.dump(config, f, indent=2)
-            # Reload config defaults
-            self._config_defaults = self._load_config_defaults()
+            # Only adopt the new config once it is on disk
+            self._config_json = config
+            self._config_defaults[namespace] = namespace_defaults
+            self._rebuild_effective()
             return {"success": True, "persisted": defaults}
         except IOError as e:
             return {"error": f"Failed to write config file: {e}"}
@@ -40,6 +40,21 @@ PLACEHOLDER_DESCRIPTIONS = {
     "duration": "Video duration in seconds. Default: 5.",
     "fps": "Frames per second for video output. Default: 16.",
 }
+# Make seed and other optional parameters non-required
+# Only 'prompt' should be required for generate_image
+# Only 'tags' and 'lyrics' should be required for generate_song
+# Only 'prompt' should be required for generate_video
+OPTIONAL_PARAMS = frozenset({
+    "seed", "width", "height", "model", "steps", "cfg",
+    "sampler_name", "scheduler", "denoise", "negative_prompt",
+    "seconds", "lyrics_strength",  # Audio-specific optional params
+    "duration", "fps"  # Video-specific optional params
+})
+# Workflows whose defaults live outside the "image" namespace
+WORKFLOW_NAMESPACES = {
+    "generate_song": "audio",
+    "generate_video": "video",
+}
 DEFAULT_OUTPUT_KEYS = ("images", "image", "gifs", "gif")
 AUDIO_OUTPUT_KEYS = ("audio", "audios", "sound", "files")
 VIDEO_OUTPUT_KEYS = ("videos", "video", "mp4", "mov", "webm")
@@ -121,7 +136,7 @@ class WorkflowManager:
             workflow_defaults = metadata.get("defaults", {})
             if not workflow_defaults and workflow_id in ["generate_image", "generate_song", "generate_video"]:
                 # Use namespace-based defaults
-                namespace = self._determine_namespace(workflow_id)
+                namespace = self.determine_namespace(workflow_id)
                 # This will be populated by defaults_manager when needed
             
             catalog.append({
@@ -175,7 +190,7 @@ class WorkflowManager:
                     override_mappings[param_name] = param.bindings
         
         # Determine namespace for defaults
-        namespace = self._determine_namespace(workflow_id)
+        namespace = self.determine_namespace(workflow_id)
         
         # Apply overrides with constraints
         for param_name, value in overrides.items():
@@ -208,10 +223,11 @@ class WorkflowManager:
         
         # Apply defaults for parameters not in overrides
         parameters = self._extract_parameters(workflow)
+        namespace_defaults = defaults_manager.effective_defaults.get(namespace, {}) if defaults_manager else {}
         for param_name, param in parameters.items():
             if param_name not in overrides and not param.required:
                 if defaults_manager:
-                    default_value = defaults_manager.get_default(namespace, param.name, None)
+                    default_value = namespace_defaults.get(param.name)
                     if default_value is not None:
                         for node_id, input_name in param.bindings:
                             if node_id in workflow and "inputs" in workflow[node_id]:
@@ -267,7 +283,8 @@ class WorkflowManager:
         workflow = copy.deepcopy(definition.template)
         
         # Determine namespace (image, audio, or video)
-        namespace = self._determine_namespace(definition.workflow_id)
+        namespace = self.determine_namespace(definition.workflow_id)
+        namespace_defaults = defaults_manager.effective_defaults.get(namespace, {}) if defaults_manager else {}
         
         for param in definition.parameters.values():
             if param.required and param.name not in provided_params:
@@ -279,12 +296,12 @@ class WorkflowManager:
                 if param.name == "seed" and param.annotation is int:
                     # Special handling for seed - generate random
                     raw_value = random.randint(0, 2**32 - 1)
-                    logger.debug(f"Generated random seed: {raw_value}")
+                    logger.debug("Generated random seed: %s", raw_value)
                 elif defaults_manager:
                     # Use defaults manager to get value with proper precedence
-                    raw_value = defaults_manager.get_default(namespace, param.name, None)
+                    raw_value = namespace_defaults.get(param.name)
                     if raw_value is not None:
-                        logger.debug(f"Using default value for {param.name}: {raw_value}")
+                        logger.debug("Using default value for %s: %s", param.name, raw_value)
                     else:
                         # Skip parameters without defaults
                         continue
@@ -314,17 +331,7 @@ class WorkflowManager:
                 )
                 parameter = parameters.get(param_name)
                 if not parameter:
-                    # Make seed and other optional parameters non-required
-                    # Only 'prompt' should be required for generate_image
-                    # Only 'tags' and 'lyrics' should be required for generate_song
-                    # Only 'prompt' should be required for generate_video
-                    optional_params = {
-                        "seed", "width", "height", "model", "steps", "cfg",
-                        "sampler_name", "scheduler", "denoise", "negative_prompt",
-                        "seconds", "lyrics_strength",  # Audio-specific optional params
-                        "duration", "fps"  # Video-specific optional params
-                    }
-                    is_required = param_name not in optional_params
+                    is_required = param_name not in OPTIONAL_PARAMS
                     parameter = WorkflowParameter(
                         name=param_name,
                         placeholder=placeholder_value,
@@ -378,14 +385,9 @@ class WorkflowManager:
         readable = readable if readable else stem
         return f"Execute the '{readable}' ComfyUI workflow."
 
-    def _determine_namespace(self, workflow_id: str) -> str:
+    def determine_namespace(self, workflow_id: str) -> str:
         """Determine namespace based on workflow ID."""
-        if workflow_id == "generate_song":
-            return "audio"
-        elif workflow_id == "generate_video":
-            return "video"
-        else:
-            return "image"  # default fallback
+        return WORKFLOW_NAMESPACES.get(workflow_id, "image")  # image is the default fallback
     
     def _guess_output_preferences(self, workflow: Dict[str, Any]):
         for node in workflow.values():
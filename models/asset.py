@@ -3,10 +3,26 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Dict, Optional
-from urllib.parse import quote
 
+# Characters quote(..., safe='') never escapes (RFC 3986 unreserved)
+_UNRESERVED = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_.-~"
+# str.translate table mapping every other byte value (as a latin-1 code point) to %XX
+_PERCENT_ENCODE = {byte: f"%{byte:02X}" for byte in range(256) if chr(byte) not in _UNRESERVED}
 
-@dataclass
+
+def _quote_component(value: str) -> str:
+    """Percent-encode a URL component, equivalent to quote(value, safe='').
+    
+    rstrip runs in C and leaves an empty string only if every character is
+    unreserved, which is the common case for ComfyUI output filenames. Other
+    values are UTF-8 encoded and escaped byte-wise with a single str.translate.
+    """
+    if not value.rstrip(_UNRESERVED):
+        return value
+    return value.encode("utf-8").decode("latin-1").translate(_PERCENT_ENCODE)
+
+
+@dataclass(slots=True, kw_only=True)
 class AssetRecord:
     """Record of a generated asset for tracking and viewing.
     
@@ -19,8 +35,12 @@ class AssetRecord:
     folder_type: str  # Stable identity: type (usually "output")
     prompt_id: str  # Link to ComfyUI history
     workflow_id: str
-    created_at: datetime
-    expires_at: Optional[datetime]
+    created_at: float  # time.monotonic() seconds
+    expires_at: Optional[float]  # time.monotonic() seconds
+    # Wall-clock creation time (time.time() seconds), for display only. The
+    # monotonic fields above can't be mapped back to wall time reliably: the
+    # monotonic clock stops during suspend and ignores NTP steps.
+    created_at_wall: float
     
     # Presentation/display fields
     mime_type: str
@@ -29,10 +49,8 @@ class AssetRecord:
     bytes_size: int
     sha256: Optional[str]  # Content hash for deduplication
     
-    # ComfyUI history snapshot (full /history/{prompt_id} response)
-    comfy_history: Optional[Dict[str, Any]] = field(default=None)
-    # Original submitted workflow (for provenance)
-    submitted_workflow: Optional[Dict[str, Any]] = field(default=None)
+    # Provenance (comfy_history, submitted_workflow) is kept out of the record
+    # in AssetRegistry's side table; see AssetRegistry.get_history.
     
     # Additional metadata
     metadata: Dict[str, Any] = field(default_factory=dict)
@@ -40,6 +58,25 @@ class AssetRecord:
     # Session tracking for conversation isolation
     session_id: Optional[str] = None
     
+    # ComfyUI base URL and the asset URL built from it, set by the registry via
+    # set_base_url. Declared as fields because slotted instances have no __dict__.
+    _base_url: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _asset_url: str = field(default="", init=False, repr=False, compare=False)
+    
+    @property
+    def created_at_iso(self) -> str:
+        """Creation time as an ISO 8601 string (for tool responses)."""
+        return datetime.fromtimestamp(self.created_at_wall).isoformat()
+    
+    @property
+    def expires_at_iso(self) -> Optional[str]:
+        """Expiration time as an ISO 8601 string, or None if the asset never expires."""
+        if self.expires_at is None:
+            return None
+        return datetime.fromtimestamp(
+            self.created_at_wall + (self.expires_at - self.created_at)
+        ).isoformat()
+    
     def get_asset_url(self, base_url: str) -> str:
         """Get asset URL for a given ComfyUI base URL.
         
@@ -50,8 +87,8 @@ class AssetRecord:
         base_url = base_url.rstrip('/')
         
         # URL encode filename and subfolder to handle special characters
-        encoded_filename = quote(self.filename, safe='')
-        encoded_subfolder = quote(self.subfolder, safe='') if self.subfolder else ''
+        encoded_filename = _quote_component(self.filename)
+        encoded_subfolder = _quote_component(self.subfolder) if self.subfolder else ''
         
         # Build URL with proper encoding
         if encoded_subfolder:
@@ -61,17 +98,15 @@ class AssetRecord:
     
     @property
     def asset_url(self) -> str:
-        """Compute asset URL on-the-fly from stable identity.
+        """Asset URL computed from stable identity.
         
-        Note: This requires the base URL to be stored. The registry
-        sets this via _base_url attribute. Falls back to empty string
+        Note: This requires the base URL to be set. The registry calls
+        set_base_url, which builds the URL once. Falls back to empty string
         if base URL not available.
         """
-        base_url = getattr(self, '_base_url', None)
-        if base_url:
-            return self.get_asset_url(base_url)
-        return ""
+        return self._asset_url
     
     def set_base_url(self, base_url: str):
-        """Set the ComfyUI base URL for computing asset URLs."""
+        """Set the ComfyUI base URL and precompute the asset URL."""
         self._base_url = base_url
+        self._asset_url = self.get_asset_url(base_url) if base_url else ""
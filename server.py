@@ -31,6 +31,8 @@ WORKFLOW_DIR = Path(os.getenv("COMFY_MCP_WORKFLOW_DIR", str(Path(__file__).paren
 
 # Asset registry configuration
 ASSET_TTL_HOURS = int(os.getenv("COMFY_MCP_ASSET_TTL_HOURS", "24"))
+# 0 or empty means no cap
+ASSET_MAX_COUNT = int(os.getenv("COMFY_MCP_MAX_ASSETS", "10000") or 0) or None
 
 # ComfyUI connection configuration
 COMFYUI_URL = os.getenv("COMFYUI_URL", "http://localhost:8188")
@@ -129,7 +131,7 @@ if not check_comfyui_available(COMFYUI_URL):
 comfyui_client = ComfyUIClient(COMFYUI_URL)
 workflow_manager = WorkflowManager(WORKFLOW_DIR)
 defaults_manager = DefaultsManager(comfyui_client)
-asset_registry = AssetRegistry(ttl_hours=ASSET_TTL_HOURS, comfyui_base_url=COMFYUI_URL)
+asset_registry = AssetRegistry(ttl_hours=ASSET_TTL_HOURS, comfyui_base_url=COMFYUI_URL, max_assets=ASSET_MAX_COUNT)
 
 
 # Define application context (for future use)
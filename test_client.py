@@ -10,8 +10,6 @@ import pprint
 import sys
 from typing import Any, Dict, Optional
 
-import requests
-
 # Configuration
 MCP_ENDPOINT = "http://127.0.0.1:9000/mcp"
 REQUEST_TIMEOUT = 300  # 5 minutes for long-running operations
@@ -23,9 +21,16 @@ REQUEST_HEADERS = {
 
 def parse_sse_response(response_text: str) -> dict:
     """Parse Server-Sent Events (SSE) response format."""
-    lines = response_text.replace("\r\n", "\n").split("\n")
-    for line in lines:
-        line = line.strip()
+    # Scan the original string line by line without copying or splitting it,
+    # and stop at the first JSON data line. strip() drops a trailing "\r".
+    pos = 0
+    end = len(response_text)
+    while pos <= end:
+        newline = response_text.find("\n", pos)
+        if newline == -1:
+            newline = end
+        line = response_text[pos:newline].strip()
+        pos = newline + 1
         if line.startswith("data: "):
             json_str = line[6:]  # Remove "data: " prefix
             try:
@@ -35,8 +40,25 @@ def parse_sse_response(response_text: str) -> dict:
     raise ValueError("No valid JSON data found in SSE response")
 
 
+_session = None
+
+
+def _get_session():
+    """Return the shared HTTP session, creating it on first use."""
+    global _session
+    if _session is None:
+        # Imported here so `--help` and argument errors don't pay for loading requests
+        import requests
+
+        _session = requests.Session()
+        _session.headers.update(REQUEST_HEADERS)
+    return _session
+
+
 def _make_request(method: str, params: Dict[str, Any], request_id: int = 1) -> Optional[dict]:
     """Make an MCP JSON-RPC request and return the parsed response."""
+    import requests
+
     request = {
         "jsonrpc": "2.0",
         "id": request_id,
@@ -45,10 +67,9 @@ def _make_request(method: str, params: Dict[str, Any], request_id: int = 1) -> O
     }
 
     try:
-        response = requests.post(
+        response = _get_session().post(
             MCP_ENDPOINT,
             json=request,
-            headers=REQUEST_HEADERS,
             timeout=REQUEST_TIMEOUT,
         )
         response.raise_for_status()
@@ -123,36 +144,35 @@ def call_tool(tool_name: str, arguments: Dict[str, Any]) -> Optional[dict]:
     if "result" in result:
         result_data = result["result"]
         
-        # Parse and replace JSON strings in text fields for cleaner display
-        if "content" in result_data and isinstance(result_data["content"], list):
-            for content_item in result_data["content"]:
+        # Parse and replace JSON strings in text fields for cleaner display.
+        # The MCP response format nests the tool result as a JSON string in the
+        # first content item; remember it here so it isn't parsed twice.
+        first_payload = None
+        content = result_data.get("content")
+        if isinstance(content, list):
+            for index, content_item in enumerate(content):
                 if isinstance(content_item, dict) and "text" in content_item:
                     text_content = content_item["text"]
-                    try:
-                        # Try to parse as JSON - if successful, replace text with parsed dict
-                        parsed = json.loads(text_content)
-                        content_item["text"] = parsed
-                    except (json.JSONDecodeError, TypeError):
+                    # Only objects/arrays are worth parsing; skip json.loads for plain text
+                    if isinstance(text_content, str) and text_content.lstrip().startswith(("{", "[")):
+                        try:
+                            # Try to parse as JSON - if successful, replace text with parsed dict
+                            parsed = json.loads(text_content)
+                            content_item["text"] = parsed
+                            if index == 0 and isinstance(parsed, dict):
+                                first_payload = parsed
+                            continue
+                        except json.JSONDecodeError:
+                            pass
+                    if isinstance(text_content, str):
                         # If not JSON, just remove newlines for cleaner display
                         content_item["text"] = text_content.replace("\n", "").strip()
         
         print(f"\n[+] Response from server:")
         print(json.dumps(result_data, indent=2))
         
-        # Handle nested content structure (MCP response format)
-        # Response may have content array with text field containing JSON string
-        if "content" in result_data and isinstance(result_data["content"], list) and len(result_data["content"]) > 0:
-            first_content = result_data["content"][0]
-            if isinstance(first_content, dict) and "text" in first_content:
-                # If we already parsed it above, use that; otherwise try parsing
-                if isinstance(first_content["text"], dict):
-                    return first_content["text"]
-                try:
-                    parsed_text = json.loads(first_content["text"])
-                    return parsed_text
-                except (json.JSONDecodeError, TypeError):
-                    # If parsing fails, fall through to return result_data as-is
-                    pass
+        if first_payload is not None:
+            return first_payload
         
         # Return result_data directly if not in nested format
         return result_data
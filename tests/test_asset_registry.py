@@ -1,6 +1,5 @@
 """Unit tests for AssetRegistry"""
 import pytest
-import time
 from datetime import datetime, timedelta
 from managers.asset_registry import AssetRegistry
 from models.asset import AssetRecord
@@ -89,7 +88,7 @@ def test_duplicate_filename_handling():
     asset = registry.get_asset_by_identity("duplicate.png", "", "output")
     assert asset is not None
     # Should have updated history
-    assert asset.comfy_history["v2"] == "data"
+    assert registry.get_history(asset.asset_id)["comfy_history"]["v2"] == "data"
     # Should still have same asset_id
     assert asset.asset_id == record1.asset_id
 
@@ -128,10 +127,44 @@ def test_list_assets_filtering():
         assert all_assets[i].created_at >= all_assets[i + 1].created_at
 
 
+def test_list_assets_combined_filters():
+    """Test filtering by workflow_id and session_id together, newest first"""
+    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
+    
+    for i in range(6):
+        registry.register_asset(
+            filename=f"combo_{i}.png",
+            subfolder="",
+            folder_type="output",
+            workflow_id="generate_image" if i % 2 == 0 else "generate_song",
+            prompt_id=f"prompt_{i}",
+            session_id="session_a" if i < 4 else "session_b"
+        )
+    
+    # Session filter only
+    session_assets = registry.list_assets(session_id="session_a")
+    assert [a.filename for a in session_assets] == [f"combo_{i}.png" for i in (3, 2, 1, 0)]
+    
+    # Both filters
+    assets = registry.list_assets(workflow_id="generate_image", session_id="session_a")
+    assert [a.filename for a in assets] == ["combo_2.png", "combo_0.png"]
+    
+    # Limit stops early
+    assets = registry.list_assets(limit=1, workflow_id="generate_image")
+    assert [a.filename for a in assets] == ["combo_4.png"]
+    
+    # Unknown filter values return nothing
+    assert registry.list_assets(workflow_id="missing") == []
+    assert registry.list_assets(session_id="missing") == []
+
+
 def test_asset_expiration():
     """Test TTL cleanup works"""
-    # Use very short TTL for testing
-    registry = AssetRegistry(ttl_hours=0.0001, comfyui_base_url="http://localhost:8188")  # ~0.36 seconds
+    # Use very short TTL and a fake clock so the test doesn't sleep
+    now = [1000.0]
+    registry = AssetRegistry(
+        ttl_hours=0.0001, comfyui_base_url="http://localhost:8188", clock=lambda: now[0]
+    )  # ~0.36 seconds
     
     asset_record = registry.register_asset(
         filename="temp.png",
@@ -148,8 +181,8 @@ def test_asset_expiration():
     # Asset should exist immediately
     assert registry.get_asset(asset_id) is not None
     
-    # Wait for expiration
-    time.sleep(1)
+    # Advance past expiration
+    now[0] += 1
     
     # Cleanup should remove it
     registry.cleanup_expired()
@@ -194,10 +227,273 @@ def test_provenance_storage():
         submitted_workflow=workflow
     )
     
-    assert asset_record.comfy_history == history
-    assert asset_record.submitted_workflow == workflow
+    # Provenance lives in the registry, not on the record
+    assert not hasattr(asset_record, "comfy_history")
     
     # Retrieve and verify
-    found = registry.get_asset(asset_record.asset_id)
-    assert found.comfy_history == history
-    assert found.submitted_workflow == workflow
+    stored = registry.get_history(asset_record.asset_id)
+    assert stored["comfy_history"] == history
+    assert stored["submitted_workflow"] == workflow
+    assert registry.get_history("missing") is None
+    
+    # The returned dict is a copy
+    stored["comfy_history"] = None
+    assert registry.get_history(asset_record.asset_id)["comfy_history"] == history
+
+
+def test_timestamps_serialize_to_iso():
+    """Test timestamps serialize as wall-clock ISO strings"""
+    registry = AssetRegistry(ttl_hours=1, comfyui_base_url="http://localhost:8188")
+    asset_record = registry.register_asset(
+        filename="clock.png",
+        subfolder="",
+        folder_type="output",
+        workflow_id="generate_image",
+        prompt_id="test_123"
+    )
+    
+    created = datetime.fromisoformat(asset_record.created_at_iso)
+    expires = datetime.fromisoformat(asset_record.expires_at_iso)
+    assert abs((created - datetime.now()).total_seconds()) < 5
+    assert abs((expires - created) - timedelta(hours=1)) < timedelta(seconds=1)
+
+
+def test_display_timestamps_ignore_clock_drift():
+    """Test ISO timestamps use wall time even if the expiry clock jumps"""
+    registry = AssetRegistry(
+        ttl_hours=1, comfyui_base_url="http://localhost:8188", clock=lambda: 5.0
+    )
+    asset_record = registry.register_asset(
+        filename="drift.png",
+        subfolder="",
+        folder_type="output",
+        workflow_id="generate_image",
+        prompt_id="test_123"
+    )
+    
+    created = datetime.fromisoformat(asset_record.created_at_iso)
+    expires = datetime.fromisoformat(asset_record.expires_at_iso)
+    assert abs((created - datetime.now()).total_seconds()) < 5
+    assert expires - created == timedelta(hours=1)
+
+
+def test_expiry_at_zero_timestamp():
+    """Test an expires_at of 0.0 is a real deadline, not 'never expires'"""
+    now = [0.0]
+    registry = AssetRegistry(
+        ttl_hours=0, comfyui_base_url="http://localhost:8188", clock=lambda: now[0]
+    )
+    asset_record = registry.register_asset(
+        filename="zero.png",
+        subfolder="",
+        folder_type="output",
+        workflow_id="generate_image",
+        prompt_id="test_123"
+    )
+    assert asset_record.expires_at == 0.0
+    assert asset_record.expires_at_iso is not None
+    
+    now[0] = 1.0
+    assert registry.get_asset(asset_record.asset_id) is None
+    assert registry.get_asset_by_identity("zero.png", "", "output") is None
+
+
+def test_identity_with_colons_does_not_collide():
+    """Test identities that would collide if joined with ':' stay distinct"""
+    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
+    first = registry.register_asset(
+        filename="c.png",
+        subfolder="a:b",
+        folder_type="output",
+        workflow_id="generate_image",
+        prompt_id="p1"
+    )
+    second = registry.register_asset(
+        filename="b:c.png",
+        subfolder="a",
+        folder_type="output",
+        workflow_id="generate_image",
+        prompt_id="p2"
+    )
+    
+    assert first.asset_id != second.asset_id
+    assert registry.get_asset_by_identity("c.png", "a:b", "output").asset_id == first.asset_id
+    assert registry.get_asset_by_identity("b:c.png", "a", "output").asset_id == second.asset_id
+
+
+def test_asset_record_is_slotted():
+    """Test AssetRecord instances carry no per-instance __dict__"""
+    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
+    asset_record = registry.register_asset(
+        filename="slots.png",
+        subfolder="",
+        folder_type="output",
+        workflow_id="generate_image",
+        prompt_id="test_123"
+    )
+    
+    assert not hasattr(asset_record, "__dict__")
+    assert asset_record.asset_url.startswith("http://localhost:8188/view")
+
+
+def test_duplicate_registration_without_history():
+    """Test re-registering without history keeps the stored provenance"""
+    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
+    first = registry.register_asset(
+        filename="retry.png",
+        subfolder="",
+        folder_type="output",
+        workflow_id="generate_image",
+        prompt_id="prompt_1",
+        comfy_history={"v1": "data"},
+        submitted_workflow={"nodes": []}
+    )
+    second = registry.register_asset(
+        filename="retry.png",
+        subfolder="",
+        folder_type="output",
+        workflow_id="generate_image",
+        prompt_id="prompt_1"
+    )
+    
+    assert second is first
+    stored = registry.get_history(first.asset_id)
+    assert stored["comfy_history"] == {"v1": "data"}
+    assert stored["submitted_workflow"] == {"nodes": []}
+
+
+def test_get_asset_hit_skips_lock():
+    """Test that reading a live asset does not take the registry lock"""
+    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
+    asset_record = registry.register_asset(
+        filename="hot.png",
+        subfolder="",
+        folder_type="output",
+        workflow_id="generate_image",
+        prompt_id="prompt_hot"
+    )
+    
+    class ForbiddenLock:
+        def __enter__(self):
+            raise AssertionError("lock taken on the read path")
+        
+        def __exit__(self, *exc):
+            return False
+    
+    registry._lock = ForbiddenLock()
+    assert registry.get_asset(asset_record.asset_id) is asset_record
+    assert registry.get_asset("missing") is None
+
+
+def test_register_assets_bulk():
+    """Test bulk registration matches per-asset registration"""
+    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
+    existing = registry.register_asset(
+        filename="batch_0.png",
+        subfolder="",
+        folder_type="output",
+        workflow_id="generate_image",
+        prompt_id="prompt_batch"
+    )
+    
+    records = registry.register_assets_bulk([
+        {
+            "filename": f"batch_{i}.png",
+            "subfolder": "",
+            "folder_type": "output",
+            "workflow_id": "generate_image",
+            "prompt_id": "prompt_batch",
+            "session_id": "session_1",
+        }
+        for i in range(3)
+    ])
+    
+    assert len(records) == 3
+    assert records[0] is existing  # Deduplicated by identity
+    assert len({r.asset_id for r in records}) == 3
+    assert records[1].created_at == records[2].created_at
+    assert registry.get_asset(records[2].asset_id) is records[2]
+    assert registry.list_assets(session_id="session_1") == [records[2], records[1]]
+    assert registry.register_assets_bulk([]) == []
+
+
+def test_quote_component_matches_quote():
+    """Test the URL-encoding fast path agrees with urllib.parse.quote"""
+    from urllib.parse import quote
+    from models.asset import _quote_component
+    
+    for value in ["output_9.png", "test image #2.png", "日本語/テスト.png", "a~b-c_d.e", "50%.png"]:
+        assert _quote_component(value) == quote(value, safe='')
+
+
+def test_max_assets_evicts_oldest():
+    """Test that registering past max_assets evicts the oldest records"""
+    registry = AssetRegistry(comfyui_base_url="http://localhost:8188", max_assets=3)
+    records = [
+        registry.register_asset(
+            filename=f"capped_{i}.png",
+            subfolder="",
+            folder_type="output",
+            workflow_id="generate_image",
+            prompt_id=f"prompt_{i}",
+            session_id="session_1"
+        )
+        for i in range(5)
+    ]
+    
+    assert registry.get_asset(records[0].asset_id) is None
+    assert registry.get_asset_by_identity("capped_1.png", "", "output") is None
+    assert registry.get_history(records[1].asset_id) is None
+    assert registry.list_assets(limit=10, session_id="session_1") == records[:1:-1]
+    assert registry.cleanup_expired() == 0
+
+
+def test_eviction_compacts_expiry_heap():
+    """Test evicted records don't leave unbounded stale entries on the expiry heap"""
+    registry = AssetRegistry(comfyui_base_url="http://localhost:8188", max_assets=10)
+    for i in range(1000):
+        registry.register_asset(
+            filename=f"heap_{i}.png",
+            subfolder="",
+            folder_type="output",
+            workflow_id="generate_image",
+            prompt_id=f"prompt_{i}"
+        )
+    
+    assert len(registry.list_assets(limit=100)) == 10
+    assert len(registry._expiry_heap) <= 2 * 10
+    # Every live record still has its heap entry
+    live = {(r.expires_at, r.asset_id) for r in registry.list_assets(limit=100)}
+    assert live <= set(registry._expiry_heap)
+
+
+def test_max_assets_must_be_positive():
+    """Test a cap below 1 is rejected rather than silently becoming 1"""
+    with pytest.raises(ValueError):
+        AssetRegistry(comfyui_base_url="http://localhost:8188", max_assets=0)
+    assert AssetRegistry(comfyui_base_url="http://localhost:8188", max_assets=None).max_assets is None
+
+
+def test_injected_clock():
+    """Test timestamps come from the injected clock, read once per bulk batch"""
+    calls = []
+    
+    def clock():
+        calls.append(None)
+        return 1000.0
+    
+    registry = AssetRegistry(comfyui_base_url="http://localhost:8188", ttl_hours=1, clock=clock)
+    records = registry.register_assets_bulk([
+        {
+            "filename": f"clock_{i}.png",
+            "subfolder": "",
+            "folder_type": "output",
+            "workflow_id": "generate_image",
+            "prompt_id": "prompt_clock",
+        }
+        for i in range(3)
+    ])
+    
+    assert len(calls) == 1
+    assert all(r.created_at == 1000.0 for r in records)
+    assert all(r.expires_at == 1000.0 + 3600 for r in records)
@@ -4,10 +4,9 @@ from managers.asset_registry import AssetRegistry
 from models.asset import AssetRecord
 
 
-def test_asset_url_encoding():
+def test_asset_url_encoding(asset_registry):
     """Verify URL encoding works for special characters"""
-    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
-    asset_record = registry.register_asset(
+    asset_record = asset_registry.register_asset(
         filename="test image #2.png",
         subfolder="my folder",
         folder_type="output",
@@ -28,10 +27,9 @@ def test_asset_url_encoding():
     assert "my%20folder" in url
 
 
-def test_asset_identity_lookup():
+def test_asset_identity_lookup(asset_registry):
     """Verify O(1) lookup by identity"""
-    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
-    asset_record = registry.register_asset(
+    asset_record = asset_registry.register_asset(
         filename="test.png",
         subfolder="",
         folder_type="output",
@@ -42,19 +40,17 @@ def test_asset_identity_lookup():
     )
     
     # Lookup by identity
-    found_asset = registry.get_asset_by_identity("test.png", "", "output")
+    found_asset = asset_registry.get_asset_by_identity("test.png", "", "output")
     assert found_asset is not None
     assert found_asset.asset_id == asset_record.asset_id
-    assert found_asset.comfy_history["test"] == "data"
+    assert asset_registry.get_history(found_asset.asset_id)["comfy_history"]["test"] == "data"
 
 
-def test_list_assets():
+def test_list_assets(asset_registry):
     """Verify asset listing and filtering"""
-    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
-    
     # Create test assets
     for i in range(5):
-        registry.register_asset(
+        asset_registry.register_asset(
             filename=f"test_{i}.png",
             subfolder="",
             folder_type="output",
@@ -66,11 +62,11 @@ def test_list_assets():
         )
     
     # Test limit
-    assets = registry.list_assets(limit=2)
+    assets = asset_registry.list_assets(limit=2)
     assert len(assets) == 2
     
     # Test filtering by workflow_id
-    image_assets = registry.list_assets(workflow_id="generate_image")
+    image_assets = asset_registry.list_assets(workflow_id="generate_image")
     assert len(image_assets) == 3
     assert all(a.workflow_id == "generate_image" for a in image_assets)
 
@@ -92,6 +88,7 @@ def test_asset_url_base_url_normalization():
     # Should not have double slashes
     assert "//view" not in url
     assert url.startswith("http://localhost:8188/view")
+    assert registry.comfyui_base_url == "http://localhost:8188"
 
 
 if __name__ == "__main__":
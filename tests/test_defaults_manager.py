@@ -0,0 +1,149 @@
+"""Unit tests for DefaultsManager"""
+import json
+import pytest
+from unittest.mock import Mock
+
+import managers.defaults_manager as defaults_module
+from managers.defaults_manager import DefaultsManager
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    """Point the config file at a temporary location."""
+    config_dir = tmp_path / "comfy-mcp"
+    config_file = config_dir / "config.json"
+    monkeypatch.setattr(defaults_module, "CONFIG_DIR", config_dir)
+    monkeypatch.setattr(defaults_module, "CONFIG_FILE", config_file)
+    for name in ("IMAGE", "AUDIO", "VIDEO"):
+        monkeypatch.delenv(f"COMFY_MCP_DEFAULT_{name}_MODEL", raising=False)
+    return config_file
+
+
+@pytest.fixture
+def mock_comfyui_client():
+    """Mock ComfyUI client with a small model list."""
+    client = Mock()
+    client.available_models = ["v1-5-pruned-emaonly.ckpt", "sd_xl_base_1.0.safetensors"]
+    return client
+
+
+def test_hardcoded_defaults(config_file, mock_comfyui_client):
+    """Test hardcoded defaults are used when nothing else is set"""
+    manager = DefaultsManager(mock_comfyui_client)
+    
+    assert manager.get_default("image", "steps") == 20
+    assert manager.get_default("audio", "seconds") == 60
+    assert manager.get_default("image", "missing_key") is None
+    assert manager.get_default("unknown_namespace", "steps") is None
+
+
+def test_precedence(config_file, mock_comfyui_client, monkeypatch):
+    """Test provided > runtime > config > env > hardcoded"""
+    config_file.parent.mkdir(parents=True)
+    config_file.write_text(json.dumps({"defaults": {"image": {"steps": 25, "width": 768}}}))
+    monkeypatch.setenv("COMFY_MCP_DEFAULT_IMAGE_MODEL", "sd_xl_base_1.0.safetensors")
+    
+    manager = DefaultsManager(mock_comfyui_client)
+    assert manager.get_default("image", "model") == "sd_xl_base_1.0.safetensors"
+    assert manager.get_default("image", "steps") == 25
+    assert manager.get_default("image", "height") == 512
+    
+    manager.set_defaults("image", {"steps": 30})
+    assert manager.get_default("image", "steps") == 30
+    assert manager.get_default("image", "steps", 40) == 40
+    assert manager.get_default("image", "width") == 768
+    
+    all_defaults = manager.get_all_defaults()
+    assert all_defaults["image"]["steps"] == 30
+    assert all_defaults["image"]["model"] == "sd_xl_base_1.0.safetensors"
+    
+    # Returned dicts are copies
+    all_defaults["image"]["steps"] = 99
+    assert manager.get_default("image", "steps") == 30
+
+
+def test_persist_defaults(config_file, mock_comfyui_client):
+    """Test persisted defaults are written and take effect"""
+    manager = DefaultsManager(mock_comfyui_client)
+    result = manager.persist_defaults("audio", {"seconds": 30})
+    
+    assert result["success"] is True
+    assert json.loads(config_file.read_text())["defaults"]["audio"] == {"seconds": 30}
+    assert manager.get_default("audio", "seconds") == 30
+
+
+def test_set_defaults_rejects_unknown_model(config_file, mock_comfyui_client):
+    """Test model validation in set_defaults"""
+    manager = DefaultsManager(mock_comfyui_client)
+    result = manager.set_defaults("image", {"model": "missing.ckpt"})
+    
+    assert "errors" in result
+    assert manager.get_default("image", "model") == "v1-5-pruned-emaonly.ckpt"
+
+
+def test_effective_defaults_view(config_file, mock_comfyui_client):
+    """Test the read-only effective view tracks updates"""
+    manager = DefaultsManager(mock_comfyui_client)
+    view = manager.effective_defaults["image"]
+    assert view["steps"] == 20
+    
+    with pytest.raises(TypeError):
+        view["steps"] = 30
+    
+    manager.set_defaults("image", {"steps": 30})
+    assert manager.effective_defaults["image"]["steps"] == 30
+
+
+def test_persist_defaults_keeps_existing_config(config_file, mock_comfyui_client):
+    """Test persisting one namespace keeps other config content"""
+    config_file.parent.mkdir(parents=True)
+    config_file.write_text(json.dumps({
+        "other_setting": True,
+        "defaults": {"image": {"steps": 25}, "audio": {"seconds": 45}}
+    }))
+    
+    manager = DefaultsManager(mock_comfyui_client)
+    manager.persist_defaults("image", {"width": 1024})
+    manager.persist_defaults("image", {"height": 768})
+    
+    config = json.loads(config_file.read_text())
+    assert config["other_setting"] is True
+    assert config["defaults"]["image"] == {"steps": 25, "width": 1024, "height": 768}
+    assert config["defaults"]["audio"] == {"seconds": 45}
+    assert manager.get_default("image", "width") == 1024
+    assert manager.get_default("image", "steps") == 25
+
+
+def test_set_defaults_refreshes_empty_model_set(config_file, mock_comfyui_client):
+    """Test set_defaults picks up models that appeared after startup"""
+    mock_comfyui_client.available_models = []
+    manager = DefaultsManager(mock_comfyui_client)
+    
+    mock_comfyui_client.available_models = ["sd_xl_base_1.0.safetensors"]
+    assert "errors" in manager.set_defaults("image", {"model": "missing.ckpt"})
+    assert manager.set_defaults("image", {"model": "sd_xl_base_1.0.safetensors"})["success"] is True
+
+
+def test_default_model_source(config_file, mock_comfyui_client, monkeypatch):
+    """Test validate_default_model reports where the model default came from"""
+    monkeypatch.setenv("COMFY_MCP_DEFAULT_AUDIO_MODEL", "missing_audio.safetensors")
+    manager = DefaultsManager(mock_comfyui_client)
+    
+    assert manager.validate_default_model("image") == (True, "v1-5-pruned-emaonly.ckpt", "hardcoded")
+    assert manager.validate_default_model("audio") == (False, "missing_audio.safetensors", "env")
+    assert manager.validate_default_model("video") == (True, "", "none")
+    assert not manager.is_model_valid("audio", "missing_audio.safetensors")
+    
+    manager.set_defaults("image", {"model": "sd_xl_base_1.0.safetensors"})
+    assert manager.validate_default_model("image") == (True, "sd_xl_base_1.0.safetensors", "runtime")
+
+
+def test_reload_env(config_file, mock_comfyui_client, monkeypatch):
+    """Test env changes are only seen after reload_env"""
+    manager = DefaultsManager(mock_comfyui_client)
+    monkeypatch.setenv("COMFY_MCP_DEFAULT_IMAGE_MODEL", "sd_xl_base_1.0.safetensors")
+    assert manager.get_default("image", "model") == "v1-5-pruned-emaonly.ckpt"
+    
+    manager.reload_env()
+    assert manager.get_default("image", "model") == "sd_xl_base_1.0.safetensors"
+    assert manager._get_default_source("image", "model") == "env"
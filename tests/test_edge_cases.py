@@ -4,12 +4,10 @@ from managers.asset_registry import AssetRegistry
 from models.asset import AssetRecord
 
 
-def test_empty_comfyui_history():
+def test_empty_comfyui_history(asset_registry):
     """Test handling of missing/empty history"""
-    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
-    
     # Register with None history
-    asset_record = registry.register_asset(
+    asset_record = asset_registry.register_asset(
         filename="test.png",
         subfolder="",
         folder_type="output",
@@ -19,16 +17,16 @@ def test_empty_comfyui_history():
         submitted_workflow=None
     )
     
-    assert asset_record.comfy_history is None
-    assert asset_record.submitted_workflow is None
+    history = asset_registry.get_history(asset_record.asset_id)
+    assert history["comfy_history"] is None
+    assert history["submitted_workflow"] is None
 
 
-def test_very_long_filename():
+def test_very_long_filename(asset_registry):
     """Test handling of very long filenames"""
-    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
     long_filename = "a" * 500 + ".png"
     
-    asset_record = registry.register_asset(
+    asset_record = asset_registry.register_asset(
         filename=long_filename,
         subfolder="",
         folder_type="output",
@@ -44,11 +42,9 @@ def test_very_long_filename():
     assert url.startswith("http://")
 
 
-def test_unicode_characters_in_filename():
+def test_unicode_characters_in_filename(asset_registry):
     """Test handling of unicode characters"""
-    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
-    
-    asset_record = registry.register_asset(
+    asset_record = asset_registry.register_asset(
         filename="测试_画像_🎨.png",
         subfolder="文件夹/子文件夹",
         folder_type="output",
@@ -65,13 +61,40 @@ def test_unicode_characters_in_filename():
     assert url.startswith("http://")
 
 
-def test_multiple_assets_same_workflow():
-    """Test multiple assets from same workflow"""
-    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
+def test_unicode_spellings_stay_distinct(asset_registry):
+    """Test composed and decomposed spellings are separate assets with exact URLs"""
+    # On most Linux filesystems these are two different files
+    composed = "caf\u00e9.png"
+    decomposed = "cafe\u0301.png"
+    
+    first = asset_registry.register_asset(
+        filename=composed,
+        subfolder="",
+        folder_type="output",
+        workflow_id="generate_image",
+        prompt_id="test_123"
+    )
+    second = asset_registry.register_asset(
+        filename=decomposed,
+        subfolder="",
+        folder_type="output",
+        workflow_id="generate_image",
+        prompt_id="test_123"
+    )
     
+    assert second.asset_id != first.asset_id
+    assert second.filename == decomposed
+    assert "filename=caf%C3%A9.png" in first.asset_url
+    assert "filename=cafe%CC%81.png" in second.asset_url
+    assert asset_registry.get_asset_by_identity(composed, "", "output") is first
+    assert asset_registry.get_asset_by_identity(decomposed, "", "output") is second
+
+
+def test_multiple_assets_same_workflow(asset_registry):
+    """Test multiple assets from same workflow"""
     workflow_id = "generate_image"
     for i in range(10):
-        registry.register_asset(
+        asset_registry.register_asset(
             filename=f"output_{i}.png",
             subfolder="",
             folder_type="output",
@@ -82,13 +105,16 @@ def test_multiple_assets_same_workflow():
         )
     
     # All should be retrievable
-    assets = registry.list_assets(workflow_id=workflow_id)
+    assets = asset_registry.list_assets(workflow_id=workflow_id)
     assert len(assets) == 10
 
 
 def test_asset_cleanup_on_expiration():
     """Test that expired assets are cleaned up"""
-    registry = AssetRegistry(ttl_hours=0.0001, comfyui_base_url="http://localhost:8188")
+    now = [1000.0]
+    registry = AssetRegistry(
+        ttl_hours=0.0001, comfyui_base_url="http://localhost:8188", clock=lambda: now[0]
+    )
     
     # Register multiple assets
     asset_ids = []
@@ -104,9 +130,8 @@ def test_asset_cleanup_on_expiration():
         )
         asset_ids.append(record.asset_id)
     
-    # Wait for expiration
-    import time
-    time.sleep(1)
+    # Advance the fake clock past expiration
+    now[0] += 1
     
     # Cleanup
     cleaned = registry.cleanup_expired()
@@ -143,10 +168,9 @@ def test_base_url_with_different_ports():
         assert "test.png" in url or "test%2Epng" in url  # Encoded
 
 
-def test_empty_metadata():
+def test_empty_metadata(asset_registry):
     """Test handling of empty metadata"""
-    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
-    asset_record = registry.register_asset(
+    asset_record = asset_registry.register_asset(
         filename="test.png",
         subfolder="",
         folder_type="output",
@@ -160,14 +184,13 @@ def test_empty_metadata():
     assert asset_record.metadata == {}
     
     # Should still work
-    found = registry.get_asset(asset_record.asset_id)
+    found = asset_registry.get_asset(asset_record.asset_id)
     assert found.metadata == {}
 
 
-def test_nested_subfolder():
+def test_nested_subfolder(asset_registry):
     """Test nested subfolder paths"""
-    registry = AssetRegistry(comfyui_base_url="http://localhost:8188")
-    asset_record = registry.register_asset(
+    asset_record = asset_registry.register_asset(
         filename="test.png",
         subfolder="2024/01/15",
         folder_type="output",
@@ -1,111 +1,186 @@
 """Unit tests for job management tools"""
+import asyncio
+import json
 import pytest
+from types import SimpleNamespace
 from unittest.mock import Mock
 from tools.job import register_job_tools
 from mcp.server.fastmcp import FastMCP
 
 
-@pytest.fixture
-def mock_comfyui_client():
-    """Mock ComfyUI client for testing"""
-    client = Mock()
-    client.get_queue.return_value = {
-        "queue_running": [["exec_1", "prompt_123", {}]],
-        "queue_pending": [["exec_2", "prompt_456", {}]]
-    }
-    client.get_history.return_value = {
-        "prompt_123": {
-            "outputs": {"1": {"images": []}},
-            "status": []
-        }
+# Default ComfyUI client responses, shared by the Mock and the SimpleNamespace
+# stand-ins so they can't drift apart. Treat as read-only.
+DEFAULT_QUEUE = {
+    "queue_running": [["exec_1", "prompt_123", {}]],
+    "queue_pending": [["exec_2", "prompt_456", {}]]
+}
+DEFAULT_HISTORY = {
+    "prompt_123": {
+        "outputs": {"1": {"images": []}},
+        "status": []
     }
-    client.cancel_prompt.return_value = {"success": True}
-    return client
+}
+DEFAULT_CANCEL_RESULT = {"success": True}
 
 
-@pytest.fixture
-def mock_asset_registry():
-    """Mock asset registry for testing"""
-    registry = Mock()
+def _configure_comfyui_client(client):
+    """Set the default return values for the ComfyUI client mock."""
+    client.get_queue.return_value = DEFAULT_QUEUE
+    client.get_history.return_value = DEFAULT_HISTORY
+    client.cancel_prompt.return_value = DEFAULT_CANCEL_RESULT
+
+
+def _configure_asset_registry(registry):
+    """Set the default attributes and return values for the asset registry mock."""
     registry.comfyui_base_url = "http://localhost:8188"
     registry.list_assets.return_value = []
     registry.get_asset.return_value = None
-    return registry
 
 
-def test_get_queue_status_integration(mock_comfyui_client, mock_asset_registry):
-    """Test that get_queue_status tool is registered and works"""
+@pytest.fixture(scope="session")
+def _session_comfyui_client():
+    return Mock()
+
+
+@pytest.fixture(scope="session")
+def _session_asset_registry():
+    return Mock()
+
+
+@pytest.fixture
+def mock_comfyui_client(_session_comfyui_client):
+    """Mock ComfyUI client for testing.
+    
+    The Mock is built once per session; each test gets it reset (calls and
+    return values) and re-configured, so assertions and overrides don't leak.
+    """
+    _session_comfyui_client.reset_mock(return_value=True, side_effect=True)
+    _configure_comfyui_client(_session_comfyui_client)
+    return _session_comfyui_client
+
+
+@pytest.fixture(scope="module")
+def _module_fake_client():
+    return SimpleNamespace()
+
+
+@pytest.fixture
+def fake_comfyui_client(_module_fake_client):
+    """Plain stand-in for the ComfyUI client, for tests that assert no calls.
+    
+    Much cheaper than a Mock. Its methods are reset to the defaults for each
+    test; override one by assigning a new callable.
+    """
+    _module_fake_client.get_queue = lambda: DEFAULT_QUEUE
+    _module_fake_client.get_history = lambda prompt_id=None: DEFAULT_HISTORY
+    return _module_fake_client
+
+
+@pytest.fixture
+def mock_asset_registry(_session_asset_registry):
+    """Mock asset registry for testing (session-scoped Mock, reset per test)."""
+    _session_asset_registry.reset_mock(return_value=True, side_effect=True)
+    _configure_asset_registry(_session_asset_registry)
+    return _session_asset_registry
+
+
+@pytest.fixture(scope="module")
+def job_tools_server(_session_comfyui_client, _session_asset_registry):
+    """FastMCP server with job tools registered once for the whole module.
+    
+    The tools are bound to the session Mocks, so a test that also requests
+    mock_comfyui_client / mock_asset_registry sees them freshly reset.
+    """
+    mcp = FastMCP("test")
+    register_job_tools(mcp, _session_comfyui_client, _session_asset_registry)
+    return mcp
+
+
+@pytest.fixture(scope="module")
+def fake_job_tools_server(_module_fake_client, _session_asset_registry):
+    """Like job_tools_server, but bound to the client behind fake_comfyui_client."""
     mcp = FastMCP("test")
-    register_job_tools(mcp, mock_comfyui_client, mock_asset_registry)
+    register_job_tools(mcp, _module_fake_client, _session_asset_registry)
+    return mcp
+
+
+def _call_tool(mcp, name, arguments):
+    """Call a registered tool through FastMCP and decode its JSON result."""
+    result = asyncio.run(mcp.call_tool(name, arguments))
+    # Newer mcp releases return (content, structured_content)
+    content = result[0] if isinstance(result, tuple) else result
+    return json.loads(content[0].text)
+
+
+def test_get_queue_status_integration(job_tools_server, mock_comfyui_client):
+    """Test that get_queue_status tool is registered and works"""
+    mcp = job_tools_server
+    client = mock_comfyui_client
     
     # Verify tool is registered by checking tools list
     # Note: This is a basic integration test - actual function testing
     # would require calling through MCP protocol
     assert mcp is not None
-    mock_comfyui_client.get_queue.assert_not_called()  # Not called yet
+    client.get_queue.assert_not_called()  # Registration alone doesn't hit ComfyUI
 
 
-def test_get_job_running_scenario(mock_comfyui_client, mock_asset_registry):
-    """Test get_job logic when job is running"""
-    # This tests the logic by directly calling the client methods
-    queue_data = {
+def test_get_job_queued_position(job_tools_server, mock_comfyui_client):
+    """Test get_job reports the 1-based position of a pending prompt"""
+    mock_comfyui_client.get_queue.return_value = {
         "queue_running": [["exec_1", "prompt_123", {}]],
-        "queue_pending": []
+        "queue_pending": [
+            ["exec_2", "prompt_456", {}],
+            ["exec_3", "prompt_789", {}]
+        ]
     }
-    mock_comfyui_client.get_queue.return_value = queue_data
     
-    queue_result = mock_comfyui_client.get_queue()
-    assert len(queue_result["queue_running"]) > 0
+    result = _call_tool(job_tools_server, "get_job", {"prompt_id": "prompt_789"})
     
-    # Check if prompt_id is in running queue
-    in_queue = any(
-        "prompt_123" in str(item)
-        for item in queue_result["queue_running"]
-    )
-    assert in_queue
+    assert result["status"] == "queued"
+    assert result["position"] == 2
+    mock_comfyui_client.get_history.assert_not_called()
 
 
-def test_get_job_completed_scenario(mock_comfyui_client, mock_asset_registry):
-    """Test get_job logic when job is completed"""
-    mock_comfyui_client.get_queue.return_value = {
+def test_get_job_running_scenario(fake_job_tools_server, fake_comfyui_client):
+    """Test get_job when the prompt is in the running queue"""
+    # DEFAULT_QUEUE has prompt_123 running
+    result = _call_tool(fake_job_tools_server, "get_job", {"prompt_id": "prompt_123"})
+    
+    assert result["status"] == "running"
+    assert result["execution_id"] == "exec_1"
+
+
+def test_get_job_completed_scenario(fake_job_tools_server, fake_comfyui_client):
+    """Test get_job when the prompt has left the queue and has outputs"""
+    fake_comfyui_client.get_queue = lambda: {
         "queue_running": [],
         "queue_pending": []
     }
-    mock_comfyui_client.get_history.return_value = {
-        "prompt_123": {
-            "outputs": {"1": {"images": [{"filename": "test.png"}]}},
-            "status": []
-        }
-    }
     
-    queue_result = mock_comfyui_client.get_queue()
-    assert len(queue_result["queue_running"]) == 0
+    result = _call_tool(fake_job_tools_server, "get_job", {"prompt_id": "prompt_123"})
     
-    history = mock_comfyui_client.get_history("prompt_123")
-    assert "prompt_123" in history
-    assert "outputs" in history["prompt_123"]
+    assert result["status"] == "completed"
+    assert result["outputs"] == DEFAULT_HISTORY["prompt_123"]["outputs"]
 
 
-def test_get_job_not_found_scenario(mock_comfyui_client, mock_asset_registry):
-    """Test get_job logic when prompt_id doesn't exist"""
-    mock_comfyui_client.get_queue.return_value = {
+def test_get_job_not_found_scenario(fake_job_tools_server, fake_comfyui_client):
+    """Test get_job when prompt_id doesn't exist"""
+    fake_comfyui_client.get_queue = lambda: {
         "queue_running": [],
         "queue_pending": []
     }
-    mock_comfyui_client.get_history.return_value = {}
+    fake_comfyui_client.get_history = lambda prompt_id=None: {}
     
-    queue_result = mock_comfyui_client.get_queue()
-    history = mock_comfyui_client.get_history("nonexistent")
+    result = _call_tool(fake_job_tools_server, "get_job", {"prompt_id": "nonexistent"})
     
-    assert len(queue_result["queue_running"]) == 0
-    assert len(queue_result["queue_pending"]) == 0
-    assert "nonexistent" not in history
+    assert result["status"] == "not_found"
+    assert result["prompt_id"] == "nonexistent"
 
 
 def test_list_assets_integration(mock_comfyui_client, mock_asset_registry):
     """Test list_assets tool integration"""
+    import time
     from models.asset import AssetRecord
-    from datetime import datetime
     
     # Create mock assets
     mock_assets = [
@@ -116,15 +191,14 @@ def test_list_assets_integration(mock_comfyui_client, mock_asset_registry):
             folder_type="output",
             prompt_id="p1",
             workflow_id="generate_image",
-            created_at=datetime.now(),
+            created_at=time.monotonic(),
             expires_at=None,
+            created_at_wall=time.time(),
             mime_type="image/png",
             width=512,
             height=512,
             bytes_size=12345,
             sha256=None,
-            comfy_history=None,
-            submitted_workflow=None,
             metadata={}
         )
     ]
@@ -70,8 +70,8 @@ def register_asset_tools(
                 "bytes_size": asset_record.bytes_size,
                 "workflow_id": asset_record.workflow_id,
                 "prompt_id": asset_record.prompt_id,
-                "created_at": asset_record.created_at.isoformat(),
-                "expires_at": asset_record.expires_at.isoformat() if asset_record.expires_at else None
+                "created_at": asset_record.created_at_iso,
+                "expires_at": asset_record.expires_at_iso
             }
         
         # Enforce: only "thumb" mode for scoped version
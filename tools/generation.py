@@ -23,6 +23,9 @@ def register_workflow_generation_tools(
     """Register workflow-backed generation tools (e.g., generate_image, generate_song)"""
     
     def _register_workflow_tool(definition: WorkflowToolDefinition):
+        # Namespace for model validation, resolved once per tool rather than per call
+        namespace = workflow_manager.determine_namespace(definition.workflow_id)
+        
         def _tool_impl(*args, **kwargs):
             # Extract return_inline_preview if present (not a workflow parameter)
             return_inline_preview = kwargs.pop("return_inline_preview", False)
@@ -32,11 +35,11 @@ def register_workflow_generation_tools(
             # Coerce parameter types before signature binding
             # MCP/JSON-RPC may pass numbers as strings, so we need to convert them
             coerced_kwargs = {}
-            param_dict = {p.name: p for p in definition.parameters.values()}
             
             for key, value in kwargs.items():
-                if key in param_dict:
-                    param = param_dict[key]
+                # definition.parameters is already keyed by parameter name
+                param = definition.parameters.get(key)
+                if param is not None:
                     # Coerce to correct type if needed
                     if value is not None:
                         try:
@@ -69,17 +72,12 @@ def register_workflow_generation_tools(
             
             bound = _tool_impl.__signature__.bind(*args, **coerced_kwargs)
             bound.apply_defaults()
-            
-            # Determine namespace for validation (needed in both try and except blocks)
-            namespace = "image"  # default
-            if definition.workflow_id == "generate_song":
-                namespace = "audio"
-            elif definition.workflow_id == "generate_video":
-                namespace = "video"
+            # BoundArguments.arguments is already a plain dict; read it directly
+            arguments = bound.arguments
             
             try:
                 # Validate model before rendering workflow
-                provided_model = dict(bound.arguments).get("model")
+                provided_model = arguments.get("model")
                 resolved_model = defaults_manager.get_default(namespace, "model", provided_model)
                 
                 if resolved_model and not defaults_manager.is_model_valid(namespace, resolved_model):
@@ -98,7 +96,7 @@ def register_workflow_generation_tools(
                     
                     return {"error": error_msg}
                 
-                workflow = workflow_manager.render_workflow(definition, dict(bound.arguments), defaults_manager)
+                workflow = workflow_manager.render_workflow(definition, arguments, defaults_manager)
                 result = comfyui_client.run_custom_workflow(
                     workflow,
                     preferred_output_keys=definition.output_preferences,
@@ -123,7 +121,7 @@ def register_workflow_generation_tools(
                     defaults_manager.refresh_model_set()
                     
                     # Re-validate the model
-                    provided_model = dict(bound.arguments).get("model")
+                    provided_model = arguments.get("model")
                     resolved_model = defaults_manager.get_default(namespace, "model", provided_model)
                     
                     if resolved_model and not defaults_manager.is_model_valid(namespace, resolved_model):
@@ -217,6 +215,26 @@ def register_workflow_generation_tools(
         )
 
 
+# Map parameter names to node search patterns (used by regenerate overrides)
+_PARAM_MAPPINGS = {
+    "prompt": {"class_type": "CLIPTextEncode", "input_key": "text", "is_negative": False},
+    "negative_prompt": {"class_type": "CLIPTextEncode", "input_key": "text", "is_negative": True},
+    "steps": {"class_type": "KSampler", "input_key": "steps"},
+    "cfg": {"class_type": "KSampler", "input_key": "cfg"},
+    "sampler_name": {"class_type": "KSampler", "input_key": "sampler_name"},
+    "scheduler": {"class_type": "KSampler", "input_key": "scheduler"},
+    "denoise": {"class_type": "KSampler", "input_key": "denoise"},
+    "width": {"class_type": "EmptyLatentImage", "input_key": "width"},
+    "height": {"class_type": "EmptyLatentImage", "input_key": "height"},
+    "model": {"class_type": "CheckpointLoaderSimple", "input_key": "ckpt_name"},
+    # Audio-specific (adjust based on actual node types in workflows)
+    "tags": {"class_type": None, "input_key": "tags"},  # Will search by input key
+    "lyrics": {"class_type": None, "input_key": "lyrics"},
+    "seconds": {"class_type": None, "input_key": "seconds"},
+    "lyrics_strength": {"class_type": None, "input_key": "lyrics_strength"},
+}
+
+
 def _update_workflow_params(workflow: dict, param_overrides: dict) -> dict:
     """
     Update workflow node inputs with parameter overrides.
@@ -236,32 +254,13 @@ def _update_workflow_params(workflow: dict, param_overrides: dict) -> dict:
     - model: CheckpointLoaderSimple node, "ckpt_name" input
     - tags, lyrics, seconds: Audio-specific nodes (varies by workflow)
     """
-    # Map parameter names to node search patterns
-    param_mappings = {
-        "prompt": {"class_type": "CLIPTextEncode", "input_key": "text", "is_negative": False},
-        "negative_prompt": {"class_type": "CLIPTextEncode", "input_key": "text", "is_negative": True},
-        "steps": {"class_type": "KSampler", "input_key": "steps"},
-        "cfg": {"class_type": "KSampler", "input_key": "cfg"},
-        "sampler_name": {"class_type": "KSampler", "input_key": "sampler_name"},
-        "scheduler": {"class_type": "KSampler", "input_key": "scheduler"},
-        "denoise": {"class_type": "KSampler", "input_key": "denoise"},
-        "width": {"class_type": "EmptyLatentImage", "input_key": "width"},
-        "height": {"class_type": "EmptyLatentImage", "input_key": "height"},
-        "model": {"class_type": "CheckpointLoaderSimple", "input_key": "ckpt_name"},
-        # Audio-specific (adjust based on actual node types in workflows)
-        "tags": {"class_type": None, "input_key": "tags"},  # Will search by input key
-        "lyrics": {"class_type": None, "input_key": "lyrics"},
-        "seconds": {"class_type": None, "input_key": "seconds"},
-        "lyrics_strength": {"class_type": None, "input_key": "lyrics_strength"},
-    }
-    
     for param_name, override_value in param_overrides.items():
-        if param_name not in param_mappings:
+        mapping = _PARAM_MAPPINGS.get(param_name)
+        if mapping is None:
             # Log warning but continue - maybe it's a valid but unknown param
             logger.warning(f"Unknown parameter '{param_name}' in regenerate, skipping")
             continue
         
-        mapping = param_mappings[param_name]
         target_class = mapping.get("class_type")
         target_input = mapping["input_key"]
         is_negative = mapping.get("is_negative", False)
@@ -384,7 +383,8 @@ def register_regenerate_tool(
                 return {"error": f"Asset {asset_id} not found (registry is in-memory and resets on restart). Generate a new asset to regenerate."}
             
             # Extract the stored workflow
-            original_workflow = asset.submitted_workflow
+            history = asset_registry.get_history(asset_id) or {}
+            original_workflow = history.get("submitted_workflow")
             if not original_workflow:
                 return {"error": "No workflow data stored for this asset. Cannot regenerate."}
             
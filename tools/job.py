@@ -90,14 +90,14 @@ def register_job_tools(
                                 "execution_id": item[0] if len(item) > 0 else None
                             }
                 
-                for item in queue_pending:
+                for position, item in enumerate(queue_pending, start=1):
                     if isinstance(item, list) and len(item) > 1:
                         if item[1] == prompt_id:
                             return {
                                 "status": "queued",
                                 "prompt_id": prompt_id,
                                 "message": "Job is queued and waiting to run",
-                                "position": queue_pending.index(item) + 1 if item in queue_pending else None
+                                "position": position
                             }
             except Exception as queue_error:
                 # If queue check fails, continue to history check
@@ -230,8 +230,8 @@ def register_job_tools(
                     "width": asset.width,
                     "height": asset.height,
                     "bytes_size": asset.bytes_size,
-                    "created_at": asset.created_at.isoformat(),
-                    "expires_at": asset.expires_at.isoformat() if asset.expires_at else None,
+                    "created_at": asset.created_at_iso,
+                    "expires_at": asset.expires_at_iso,
                     "session_id": asset.session_id
                 })
             
@@ -283,18 +283,20 @@ def register_job_tools(
                 "bytes_size": asset.bytes_size,
                 "workflow_id": asset.workflow_id,
                 "prompt_id": asset.prompt_id,
-                "created_at": asset.created_at.isoformat(),
-                "expires_at": asset.expires_at.isoformat() if asset.expires_at else None,
+                "created_at": asset.created_at_iso,
+                "expires_at": asset.expires_at_iso,
                 "metadata": asset.metadata
             }
             
+            history = asset_registry.get_history(asset_id) or {}
+            
             # Include ComfyUI history if available
-            if asset.comfy_history:
-                result["comfy_history"] = asset.comfy_history
+            if history.get("comfy_history"):
+                result["comfy_history"] = history["comfy_history"]
             
             # Include submitted workflow if available
-            if asset.submitted_workflow:
-                result["submitted_workflow"] = asset.submitted_workflow
+            if history.get("submitted_workflow"):
+                result["submitted_workflow"] = history["submitted_workflow"]
             
             return result
         except Exception as e: